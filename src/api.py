@@ -1,9 +1,43 @@
-from fastapi import FastAPI
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from pydantic import BaseModel
 
-from rag_answer import answer
+from config import Settings
+from dedup import hit_sources
+from rag_answer import answer_with_usage, is_warm, warmup
+from resilience import STAGES, breaker, counters
+
+_warmup_error: dict = {}
+
+
+def _warmup_in_background() -> None:
+    """Retry warmup with jittered exponential backoff until it succeeds."""
+    s = Settings()
+    delay = 1.0
+    while True:
+        try:
+            warmup()
+        except Exception as e:
+            _warmup_error["error"] = str(e)
+            print(f"Warmup failed, retrying in up to {delay:.0f}s: {e}")
+            time.sleep(random.uniform(delay / 2, delay))
+            delay = min(delay * 2, s.warmup_retry_max_delay_s)
+            continue
+        _warmup_error.pop("error", None)
+        return
 
-app = FastAPI(title="Privacy-First RAG API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=_warmup_in_background, daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Privacy-First RAG API", lifespan=lifespan)
 
 
 class Question(BaseModel):
@@ -11,15 +45,40 @@ class Question(BaseModel):
     use_rag: bool = True
 
 
+@app.get("/healthz")
+def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def readiness(response: Response):
+    if is_warm():
+        return {"status": "ready"}
+    response.status_code = 503
+    if "error" in _warmup_error:
+        return {"status": "warming", "last_error": _warmup_error["error"]}
+    return {"status": "warming"}
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "events": counters(),
+        "breakers": {stage: "open" if breaker(stage).is_open else "closed" for stage in STAGES},
+    }
+
+
 @app.post("/answer")
 def answer_question(payload: Question):
-    response, hits = answer(payload.question, use_rag=payload.use_rag)
+    response, hits, _, degraded = answer_with_usage(payload.question, use_rag=payload.use_rag)
     return {
         "answer": response,
+        "degraded": degraded,
         "hits": [
             {
                 "chunk_id": h.get("chunk_id"),
                 "source_name": h.get("source_name"),
+                "sources": hit_sources(h),
                 "score": h.get("score"),
             }
             for h in hits
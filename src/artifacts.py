@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import Settings
+
+DOC_SCHEMA = pa.schema(
+    [
+        ("doc_id", pa.string()),
+        ("source_path", pa.string()),
+        ("source_name", pa.string()),
+        ("doc_type", pa.string()),
+        ("module", pa.string()),
+        ("text", pa.string()),
+    ]
+)
+
+CHUNK_SCHEMA = pa.schema(
+    [
+        ("chunk_id", pa.string()),
+        ("doc_id", pa.string()),
+        ("source_path", pa.string()),
+        ("source_name", pa.string()),
+        ("module", pa.string()),
+        ("doc_type", pa.string()),
+        ("text", pa.string()),
+        ("n_tokens", pa.int64()),
+    ]
+)
+
+
+ARTIFACT_FORMATS = ("parquet", "jsonl")
+
+
+def _artifact_path(s: Settings, parquet: Path, jsonl: Path, read: bool) -> Path:
+    """Path in the configured format; readers fall back to the other format if only it exists."""
+    if s.artifact_format not in ARTIFACT_FORMATS:
+        raise ValueError(
+            f"Unknown artifact_format {s.artifact_format!r}; expected one of {ARTIFACT_FORMATS}"
+        )
+    preferred, other = (parquet, jsonl) if s.artifact_format == "parquet" else (jsonl, parquet)
+    if read and not preferred.exists() and other.exists():
+        return other
+    return preferred
+
+
+def docs_path(s: Settings, read: bool = False) -> Path:
+    return _artifact_path(s, s.docs_parquet, s.docs_jsonl, read)
+
+
+def chunks_path(s: Settings, read: bool = False) -> Path:
+    return _artifact_path(s, s.chunks_parquet, s.chunks_jsonl, read)
+
+
+class RecordWriter:
+    """Buffered writer that flushes record batches to Parquet or JSONL.
+
+    At most ``batch_size`` records are held in memory at a time.
+    """
+
+    def __init__(self, path: Path, schema: pa.Schema, batch_size: int, compression: str) -> None:
+        self.path = path
+        self.schema = schema
+        self.batch_size = batch_size
+        self.buf: List[Dict[str, Any]] = []
+        if path.suffix == ".parquet":
+            self._parquet = pq.ParquetWriter(str(path), schema, compression=compression)
+            self._jsonl = None
+        else:
+            self._parquet = None
+            self._jsonl = path.open("w", encoding="utf-8")
+
+    def write(self, rec: Dict[str, Any]) -> None:
+        self.buf.append(rec)
+        if len(self.buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buf:
+            return
+        if self._parquet is not None:
+            self._parquet.write_batch(pa.RecordBatch.from_pylist(self.buf, schema=self.schema))
+        else:
+            for rec in self.buf:
+                self._jsonl.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self.buf = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._parquet is not None:
+            self._parquet.close()
+        else:
+            self._jsonl.close()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_writer(path: Path, schema: pa.Schema, s: Settings | None = None) -> RecordWriter:
+    s = s or Settings()
+    return RecordWriter(path, schema, s.artifact_batch_size, s.artifact_compression)
+
+
+def iter_record_batches(
+    path: Path,
+    schema: pa.Schema,
+    batch_size: int,
+    columns: Sequence[str] | None = None,
+) -> Iterable[pa.RecordBatch]:
+    """Stream a Parquet or JSONL artifact as Arrow record batches."""
+    if path.suffix == ".parquet":
+        yield from pq.ParquetFile(str(path)).iter_batches(
+            batch_size=batch_size, columns=list(columns) if columns else None
+        )
+        return
+
+    if columns:
+        schema = pa.schema([schema.field(c) for c in columns])
+    buf: List[Dict[str, Any]] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            buf.append(json.loads(line))
+            if len(buf) >= batch_size:
+                yield pa.RecordBatch.from_pylist(buf, schema=schema)
+                buf = []
+    if buf:
+        yield pa.RecordBatch.from_pylist(buf, schema=schema)
+
+
+def iter_records(
+    path: Path,
+    schema: pa.Schema,
+    batch_size: int,
+    columns: Sequence[str] | None = None,
+) -> Iterable[Dict[str, Any]]:
+    for batch in iter_record_batches(path, schema, batch_size, columns):
+        yield from batch.to_pylist()
+
+
+def export_jsonl(src: Path, dst: Path, schema: pa.Schema, batch_size: int) -> int:
+    n = 0
+    with dst.open("w", encoding="utf-8") as out:
+        for rec in iter_records(src, schema, batch_size):
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            n += 1
+    return n
+
+
+def export_all() -> None:
+    s = Settings()
+    for src, dst, schema in [
+        (s.docs_parquet, s.docs_jsonl, DOC_SCHEMA),
+        (s.chunks_parquet, s.chunks_jsonl, CHUNK_SCHEMA),
+    ]:
+        if not src.exists():
+            continue
+        n = export_jsonl(src, dst, schema, s.artifact_batch_size)
+        print(f"Exported {n} records: {src.name} -> {dst.name}")
+
+
+if __name__ == "__main__":
+    export_all()
@@ -16,6 +16,10 @@ Output CSV includes:
     - static_response: Response from static LLM (no RAG)
     - rag_response: Response from RAG-augmented LLM
     - rag_sources: Retrieved source documents (semicolon-separated)
+    - {static,rag}_{prompt,cached,completion}_tokens: Token usage per model call
+    - {static,rag}_degraded: "static" if the fallback message was returned because
+      the chat model was unavailable, "lexical" if RAG sources came from BM25
+      instead of vector search, empty otherwise
 """
 
 import argparse
@@ -28,7 +32,12 @@ from typing import Dict, List, Any
 from tqdm import tqdm
 
 from config import Settings
-from rag_answer import answer
+from dedup import hit_sources
+from rag_answer import answer_with_usage
+from resilience import counters
+
+
+USAGE_FIELDS = ["prompt_tokens", "cached_tokens", "completion_tokens"]
 
 
 def load_questions(input_path: Path) -> List[Dict[str, Any]]:
@@ -46,21 +55,27 @@ def load_questions(input_path: Path) -> List[Dict[str, Any]]:
 def run_inference(question: str) -> Dict[str, Any]:
     """Run both static and RAG inference on a single question."""
     # Run RAG inference
-    rag_response, rag_hits = answer(question, use_rag=True)
+    rag_response, rag_hits, rag_usage, rag_degraded = answer_with_usage(question, use_rag=True)
     
     # Run static inference (no RAG context)
-    static_response, _ = answer(question, use_rag=False)
+    static_response, _, static_usage, static_degraded = answer_with_usage(question, use_rag=False)
     
     # Format RAG sources
     rag_sources = "; ".join([
-        h.get("source_name", "Unknown") for h in rag_hits
+        name for h in rag_hits for name in hit_sources(h)
     ])
     
-    return {
+    result = {
         "static_response": static_response,
         "rag_response": rag_response,
         "rag_sources": rag_sources,
+        "static_degraded": static_degraded or "",
+        "rag_degraded": rag_degraded or "",
     }
+    for prefix, usage in (("static", static_usage), ("rag", rag_usage)):
+        for field in USAGE_FIELDS:
+            result[f"{prefix}_{field}"] = usage.get(field)
+    return result
 
 
 def batch_inference(
@@ -92,8 +107,10 @@ def batch_inference(
     output_columns = input_columns + [
         "static_response",
         "rag_response", 
-        "rag_sources"
-    ]
+        "rag_sources",
+        "static_degraded",
+        "rag_degraded",
+    ] + [f"{prefix}_{field}" for prefix in ("static", "rag") for field in USAGE_FIELDS]
     
     # Process questions and write results
     results = []
@@ -130,6 +147,22 @@ def batch_inference(
     print(f"\nResults saved to {output_path}")
     print(f"Processed {len(results)} questions successfully")
 
+    prompt_total = sum(
+        r.get(f"{p}_prompt_tokens") or 0 for r in results for p in ("static", "rag")
+    )
+    cached_total = sum(
+        r.get(f"{p}_cached_tokens") or 0 for r in results for p in ("static", "rag")
+    )
+    if prompt_total:
+        print(
+            f"Prompt tokens: {prompt_total} ({cached_total} cached, "
+            f"{100.0 * cached_total / prompt_total:.1f}%)"
+        )
+
+    events = counters()
+    if events:
+        print("Model-call events: " + ", ".join(f"{k}={v}" for k, v in sorted(events.items())))
+
 
 def main():
     parser = argparse.ArgumentParser(
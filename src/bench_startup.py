@@ -0,0 +1,109 @@
+"""
+Startup benchmark for the entry points.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter for
+each entry module, records the cumulative import time of the module itself and
+its slowest dependencies, and appends one JSON line per run to
+results/startup_importtime.jsonl so regressions can be tracked over time.
+
+Usage:
+    python src/bench_startup.py [--repeat 3] [--top 5]
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from config import Settings
+
+ENTRY_MODULES = ["rag_answer", "eval", "batch_inference", "api", "gradio_app"]
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Return (module, depth, cumulative_us) for each ``-X importtime`` line."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            depth = (len(m.group(3)) - 1) // 2
+            rows.append((m.group(4), depth, int(m.group(2))))
+    return rows
+
+
+def module_subtree(rows: List[Tuple[str, int, int]], module: str) -> List[Tuple[str, int, int]]:
+    """Lines belonging to ``module``'s import: those after the previous depth-0 line.
+
+    ``-X importtime`` prints children before their parent, so the subtree of a
+    top-level import is everything between the preceding depth-0 line and it.
+    Interpreter/site startup imports are excluded.
+    """
+    end = next(i for i, (name, depth, _) in enumerate(rows) if name == module and depth == 0)
+    start = end
+    while start > 0 and rows[start - 1][1] != 0:
+        start -= 1
+    return rows[start : end + 1]
+
+
+def measure(module: str, src_dir: Path) -> List[Tuple[str, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=src_dir,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.splitlines()[-1]}")
+    return parse_importtime(proc.stderr)
+
+
+def bench_module(module: str, src_dir: Path, repeat: int, top: int) -> Dict[str, object]:
+    runs = [module_subtree(measure(module, src_dir), module) for _ in range(repeat)]
+    totals = [rows[-1][2] for rows in runs]
+    best = runs[totals.index(min(totals))]
+    heaviest = sorted(
+        ((name, us) for name, depth, us in best if depth == 1),
+        key=lambda x: x[1],
+        reverse=True,
+    )[:top]
+    return {
+        "module": module,
+        "import_ms": round(min(totals) / 1000, 2),
+        "heaviest_deps_ms": {name: round(us / 1000, 2) for name, us in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Track import time of the entry points")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module (best is kept)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports to record")
+    args = parser.parse_args()
+
+    s = Settings()
+    s.results_dir.mkdir(parents=True, exist_ok=True)
+    out_path = s.results_dir / "startup_importtime.jsonl"
+    src_dir = Path(__file__).resolve().parent
+
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    with out_path.open("a", encoding="utf-8") as out:
+        for module in ENTRY_MODULES:
+            try:
+                rec = bench_module(module, src_dir, args.repeat, args.top)
+            except RuntimeError as e:
+                print(e)
+                continue
+            rec["timestamp"] = timestamp
+            out.write(json.dumps(rec) + "\n")
+            print(f"{module:<16} {rec['import_ms']:>9.2f} ms")
+
+    print(f"\nResults appended to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
-import json
 from typing import Iterable, List
 
 import tiktoken
 
+from artifacts import CHUNK_SCHEMA, DOC_SCHEMA, chunks_path, docs_path, iter_records, open_writer
 from config import Settings
 from privacy import is_personal
 
@@ -39,11 +39,9 @@ def chunk_docs() -> None:
     s = Settings()
     s.processed_dir.mkdir(parents=True, exist_ok=True)
 
-    with s.docs_jsonl.open("r", encoding="utf-8") as src, s.chunks_jsonl.open(
-        "w", encoding="utf-8"
-    ) as out:
-        for line in src:
-            doc = json.loads(line)
+    docs = iter_records(docs_path(s, read=True), DOC_SCHEMA, s.artifact_batch_size)
+    with open_writer(chunks_path(s), CHUNK_SCHEMA, s) as out:
+        for doc in docs:
             if doc.get("doc_type") not in s.allow_doc_types:
                 continue
 
@@ -69,7 +67,7 @@ def chunk_docs() -> None:
                     "text": chunk,
                     "n_tokens": n_tokens,
                 }
-                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.write(rec)
 
 
 if __name__ == "__main__":
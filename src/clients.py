@@ -0,0 +1,9 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def get_openai():
+    """Shared OpenAI client so every call reuses one HTTP connection pool."""
+    from openai import OpenAI
+
+    return OpenAI()
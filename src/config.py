@@ -14,6 +14,14 @@ class Settings:
 
     docs_jsonl: Path = processed_dir / "docs.jsonl"
     chunks_jsonl: Path = processed_dir / "chunks.jsonl"
+    docs_parquet: Path = processed_dir / "docs.parquet"
+    chunks_parquet: Path = processed_dir / "chunks.parquet"
+
+    # "parquet" streams zstd-compressed record batches between stages;
+    # "jsonl" keeps the line-delimited format (see src/artifacts.py to export).
+    artifact_format: str = "parquet"
+    artifact_batch_size: int = 256
+    artifact_compression: str = "zstd"
 
     faiss_index_path: Path = index_dir / "faiss.index"
     meta_path: Path = index_dir / "metadata.parquet"
@@ -36,7 +44,38 @@ class Settings:
 
     top_k: int = 8
     max_context_tokens: int = 1200
+    # Provider-side automatic prefix caching only applies to prompts with at
+    # least this many identical leading tokens.
+    prompt_cache_min_tokens: int = 1024
 
     embedding_model: str = "text-embedding-3-large"
     chat_model: str = "gpt-4o-mini"
     embedding_batch_size: int = 96
+
+    # Model-call resilience (src/resilience.py): per-attempt timeout and
+    # overall deadline per stage, jittered retries, hedging, circuit breaker.
+    embedding_timeout_s: float = 4.0
+    embedding_deadline_s: float = 10.0
+    chat_timeout_s: float = 30.0
+    chat_deadline_s: float = 60.0
+    retry_max_attempts: int = 3
+    retry_base_delay_s: float = 0.25
+    retry_max_delay_s: float = 4.0
+    hedge_default_delay_s: float = 1.0
+    hedge_window: int = 200
+    hedge_min_samples: int = 20
+    # Worker threads for hedged calls; size to the expected request concurrency.
+    hedge_pool_size: int = 16
+    breaker_failure_threshold: int = 5
+    breaker_reset_s: float = 30.0
+
+    # Startup warmup (rag_answer.warmup): bound on the connect probe and the
+    # cap on the API's retry backoff when loading the index/encoder fails.
+    warmup_connect_timeout_s: float = 5.0
+    warmup_retry_max_delay_s: float = 30.0
+
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.8
+    dedup_shingle_size: int = 5
+    dedup_num_perm: int = 128
+    dedup_bands: int = 16
@@ -0,0 +1,169 @@
+import hashlib
+import random
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, List, Set, Tuple
+
+from config import Settings
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+@dataclass
+class DedupStats:
+    n_input: int = 0
+    n_kept: int = 0
+    tokens_input: int = 0
+    tokens_kept: int = 0
+
+    @property
+    def n_collapsed(self) -> int:
+        return self.n_input - self.n_kept
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_input - self.tokens_kept
+
+    def summary(self) -> str:
+        chunk_pct = 100.0 * self.n_collapsed / self.n_input if self.n_input else 0.0
+        token_pct = 100.0 * self.tokens_saved / self.tokens_input if self.tokens_input else 0.0
+        return (
+            f"Near-duplicate collapse: {self.n_input} -> {self.n_kept} chunks "
+            f"({self.n_collapsed} collapsed, {chunk_pct:.1f}% smaller index); "
+            f"embedding tokens {self.tokens_input} -> {self.tokens_kept} "
+            f"({self.tokens_saved} saved, {token_pct:.1f}% less spend)"
+        )
+
+
+def shingles(text: str, size: int) -> Set[str]:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def shingle_hashes(text: str, size: int) -> array:
+    """Sorted, unique 32-bit shingle hashes; 4 bytes per shingle instead of a string."""
+    return array("I", sorted({_shingle_hash(sh) for sh in shingles(text, size)}))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int, seed: int = 1) -> None:
+        rng = random.Random(seed)
+        self.perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, hashes: array) -> Tuple[int, ...]:
+        if not hashes:
+            return tuple(_MAX_HASH for _ in self.perms)
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.perms
+        )
+
+
+def jaccard(a: array, b: array) -> float:
+    """Jaccard similarity of two sorted, unique hash arrays."""
+    if not a and not b:
+        return 1.0
+    i = j = inter = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            inter += 1
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            i += 1
+        else:
+            j += 1
+    return inter / (len(a) + len(b) - inter)
+
+
+class NearDuplicateIndex:
+    """Streaming near-duplicate detector over chunk records.
+
+    Candidates come from MinHash/LSH banding and are confirmed with exact
+    Jaccard over stored shingle hashes. The first chunk seen in a cluster is canonical; later
+    near-copies are recorded against its position in ``alias_chunk_ids`` and
+    ``alias_source_names``.
+    """
+
+    def __init__(self, s: Settings | None = None) -> None:
+        self.s = s or Settings()
+        self.rows = self.s.dedup_num_perm // self.s.dedup_bands
+        self.hasher = MinHasher(self.s.dedup_bands * self.rows)
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+        self.kept_hashes: List[array] = []
+        self.alias_chunk_ids: List[List[str]] = []
+        self.alias_source_names: List[List[str]] = []
+        self.canonical_source_names: List[str] = []
+        self.stats = DedupStats()
+
+    def add(self, rec: Dict[str, Any]) -> int | None:
+        """Register a chunk; return its kept position, or None if collapsed."""
+        n_tokens = int(rec.get("n_tokens", 0))
+        self.stats.n_input += 1
+        self.stats.tokens_input += n_tokens
+
+        sh = shingle_hashes(rec["text"], self.s.dedup_shingle_size)
+        sig = self.hasher.signature(sh)
+        band_keys = [
+            (b, sig[b * self.rows : (b + 1) * self.rows]) for b in range(self.s.dedup_bands)
+        ]
+
+        candidates: List[int] = []
+        for key in band_keys:
+            for pos in self.buckets.get(key, []):
+                if pos not in candidates:
+                    candidates.append(pos)
+
+        match = next(
+            (
+                pos
+                for pos in candidates
+                if jaccard(sh, self.kept_hashes[pos]) >= self.s.dedup_threshold
+            ),
+            None,
+        )
+        if match is not None:
+            self.alias_chunk_ids[match].append(rec["chunk_id"])
+            name = rec["source_name"]
+            if name != self.canonical_source_names[match] and name not in self.alias_source_names[match]:
+                self.alias_source_names[match].append(name)
+            return None
+
+        pos = len(self.kept_hashes)
+        self.kept_hashes.append(sh)
+        self.alias_chunk_ids.append([])
+        self.alias_source_names.append([])
+        self.canonical_source_names.append(rec["source_name"])
+        for key in band_keys:
+            self.buckets.setdefault(key, []).append(pos)
+        self.stats.n_kept += 1
+        self.stats.tokens_kept += n_tokens
+        return pos
+
+
+def hit_sources(hit: Dict[str, Any]) -> List[str]:
+    """Canonical source name followed by any collapsed alias sources.
+
+    Always a plain list of str, even when the aliases come from a pandas row
+    as a numpy array, so the result is JSON-serializable.
+    """
+    names = [str(hit.get("source_name", "Unknown"))]
+    aliases = hit.get("alias_source_names")
+    if aliases is not None:
+        for name in aliases:
+            name = str(name)
+            if name not in names:
+                names.append(name)
+    return names
@@ -1,12 +1,14 @@
-import json
 from typing import List
 
 import faiss
 import numpy as np
-import pandas as pd
-from openai import OpenAI
-
+import pyarrow as pa
+import pyarrow.parquet as pq
+from artifacts import CHUNK_SCHEMA, chunks_path, iter_record_batches
+from clients import get_openai
 from config import Settings
+from dedup import NearDuplicateIndex
+from resilience import call_model
 
 
 def _batch(iterable: List[str], size: int):
@@ -18,32 +20,52 @@ def build_index() -> None:
     s = Settings()
     s.index_dir.mkdir(parents=True, exist_ok=True)
 
-    texts = []
-    meta = []
-    with s.chunks_jsonl.open("r", encoding="utf-8") as f:
-        for line in f:
-            rec = json.loads(line)
-            texts.append(rec["text"])
-            meta.append(rec)
-
-    if not texts:
-        raise RuntimeError("No chunks found. Run src/chunking.py first.")
+    client = get_openai()
+    dedup = NearDuplicateIndex(s) if s.dedup_enabled else None
+    index = None
+    kept_batches: List[pa.RecordBatch] = []
 
-    client = OpenAI()
-    embeddings = []
+    batches = iter_record_batches(chunks_path(s, read=True), CHUNK_SCHEMA, s.artifact_batch_size)
+    for batch in batches:
+        if dedup is not None:
+            cols = batch.select(["chunk_id", "source_name", "text", "n_tokens"]).to_pydict()
+            keep = [
+                dedup.add(dict(zip(cols, values))) is not None
+                for values in zip(*cols.values())
+            ]
+            batch = batch.filter(pa.array(keep, type=pa.bool_()))
+        if batch.num_rows == 0:
+            continue
 
-    for batch in _batch(texts, s.embedding_batch_size):
-        res = client.embeddings.create(model=s.embedding_model, input=batch)
-        embeddings.extend([r.embedding for r in res.data])
+        texts = batch.column("text").to_pylist()
+        for sub in _batch(texts, s.embedding_batch_size):
+            res = call_model(
+                "embedding",
+                lambda timeout: client.with_options(timeout=timeout, max_retries=0).embeddings.create(
+                    model=s.embedding_model, input=sub
+                ),
+            )
+            X = np.array([r.embedding for r in res.data], dtype="float32")
+            faiss.normalize_L2(X)
+            if index is None:
+                index = faiss.IndexFlatIP(X.shape[1])
+            index.add(X)
+        kept_batches.append(batch)
 
-    X = np.array(embeddings, dtype="float32")
-    faiss.normalize_L2(X)
+    if index is None:
+        raise RuntimeError("No chunks found. Run src/chunking.py first.")
 
-    index = faiss.IndexFlatIP(X.shape[1])
-    index.add(X)
+    meta = pa.Table.from_batches(kept_batches)
+    if dedup is not None:
+        print(dedup.stats.summary())
+        meta = meta.append_column(
+            "alias_chunk_ids", pa.array(dedup.alias_chunk_ids, type=pa.list_(pa.string()))
+        ).append_column(
+            "alias_source_names", pa.array(dedup.alias_source_names, type=pa.list_(pa.string()))
+        )
 
     faiss.write_index(index, str(s.faiss_index_path))
-    pd.DataFrame(meta).to_parquet(s.meta_path, index=False)
+    pq.write_table(meta, s.meta_path)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,8 @@ import json
 from datetime import datetime
 
 from config import Settings
-from rag_answer import answer
+from dedup import hit_sources
+from rag_answer import answer_with_usage
 
 QUESTIONS = [
     "What happens during a mammogram?",
@@ -18,18 +19,23 @@ def run_eval() -> None:
 
     with out_path.open("w", encoding="utf-8") as out:
         for q in QUESTIONS:
-            rag_resp, rag_hits = answer(q, use_rag=True)
-            static_resp, _ = answer(q, use_rag=False)
+            rag_resp, rag_hits, rag_usage, rag_degraded = answer_with_usage(q, use_rag=True)
+            static_resp, _, static_usage, static_degraded = answer_with_usage(q, use_rag=False)
 
             rec = {
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "question": q,
                 "rag_response": rag_resp,
                 "static_response": static_resp,
+                "rag_degraded": rag_degraded,
+                "static_degraded": static_degraded,
+                "rag_usage": rag_usage,
+                "static_usage": static_usage,
                 "rag_hits": [
                     {
                         "chunk_id": h.get("chunk_id"),
                         "source_name": h.get("source_name"),
+                        "sources": hit_sources(h),
                         "score": h.get("score"),
                     }
                     for h in rag_hits
@@ -1,6 +1,6 @@
 import gradio as gr
 
-from rag_answer import answer
+from rag_answer import answer, warmup
 
 
 def chat_fn(message: str):
@@ -53,5 +53,9 @@ def build_ui():
 
 
 if __name__ == "__main__":
+    try:
+        warmup()
+    except Exception as e:
+        print(f"Warmup failed, starting without it: {e}")
     ui = build_ui()
     ui.launch()
@@ -1,10 +1,10 @@
 import hashlib
-import json
 from pathlib import Path
 from typing import Iterable
 
 from docx import Document
 
+from artifacts import DOC_SCHEMA, docs_path, open_writer
 from config import Settings
 from privacy import is_personal
 
@@ -62,7 +62,7 @@ def ingest() -> None:
     if not any(s.raw_dir.rglob("*")):
         raw_dirs.append(s.project_root / "data")
 
-    with s.docs_jsonl.open("w", encoding="utf-8") as out:
+    with open_writer(docs_path(s), DOC_SCHEMA, s) as out:
         for p in iter_source_files(raw_dirs):
             text = read_docx(p) if p.suffix.lower() == ".docx" else read_text(p)
             text = text.strip()
@@ -85,7 +85,7 @@ def ingest() -> None:
                 "module": infer_module(p),
                 "text": text,
             }
-            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.write(rec)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from config import Settings
+from prompts import SYSTEM_PROMPT, USER_TEMPLATE
+
+# Everything in USER_TEMPLATE before the first placeholder is static and sits
+# right after the system prompt, so it extends the provider-cacheable prefix.
+_USER_PREFIX, _, _ = USER_TEMPLATE.partition("{")
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+NO_BACKGROUND = "(no background found)"
+
+
+@lru_cache(maxsize=1)
+def encoding():
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(encoding().encode(text))
+
+
+@lru_cache(maxsize=16)
+def static_tokens(text: str) -> int:
+    """Token count for fixed prompt text; only ever called with constants."""
+    return count_tokens(text)
+
+
+@lru_cache(maxsize=1024)
+def block_tokens(block: str) -> int:
+    """Token count for a per-chunk context block; chunks recur across questions."""
+    return count_tokens(block)
+
+
+@lru_cache(maxsize=1)
+def static_prefix_tokens() -> int:
+    """Tokens in the cacheable prefix: system prompt plus the static user preamble.
+
+    Warns once if this is below the provider's minimum for automatic prefix
+    caching, in which case cached_tokens will stay near zero.
+    """
+    n = static_tokens(SYSTEM_PROMPT) + static_tokens(_USER_PREFIX)
+    minimum = Settings().prompt_cache_min_tokens
+    if n < minimum:
+        print(
+            f"Warning: static prompt prefix is {n} tokens, below the {minimum}-token "
+            "minimum for provider prefix caching; expect cached_tokens to be ~0."
+        )
+    return n
+
+
+@lru_cache(maxsize=1)
+def template_tokens() -> int:
+    """Tokens USER_TEMPLATE adds around its placeholders."""
+    return static_tokens(USER_TEMPLATE.format(context="", question=""))
+
+
+def context_tokens(block_counts: List[int]) -> int:
+    """Tokens of blocks joined by CONTEXT_SEPARATOR, from per-block counts."""
+    if not block_counts:
+        return static_tokens(NO_BACKGROUND)
+    return sum(block_counts) + static_tokens(CONTEXT_SEPARATOR) * (len(block_counts) - 1)
+
+
+def build_messages(
+    question: str, context: str, n_context_tokens: int
+) -> Tuple[List[Dict[str, str]], int]:
+    """Order messages static-first and estimate prompt tokens.
+
+    Returns the chat messages and the estimated prompt token count. The
+    context count comes from assemble_context, static parts from cache, so
+    only the question is encoded here.
+    """
+    user_msg = USER_TEMPLATE.format(context=context, question=question)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_msg},
+    ]
+    estimate = (
+        static_tokens(SYSTEM_PROMPT)
+        + template_tokens()
+        + n_context_tokens
+        + count_tokens(question)
+    )
+    return messages, estimate
+
+
+def usage_record(res: Any, estimate: int) -> Dict[str, Any]:
+    """Per-call token accounting from a chat completion response."""
+    usage = getattr(res, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "cached_tokens": (getattr(details, "cached_tokens", None) or 0) if usage else None,
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "prompt_tokens_estimate": estimate,
+        "static_prefix_tokens": static_prefix_tokens(),
+    }
@@ -56,10 +56,21 @@ SAFETY ESCALATION
 """.strip()
 
 
+# Variable parts go last so the system prompt and this preamble form a
+# stable prefix for provider-side prompt caching (see prompt_assembly.py).
 USER_TEMPLATE = """
-Question:
-{question}
+Use the Background below to answer the Question that follows it.
 
 Background:
 {context}
+
+Question:
+{question}
+""".strip()
+
+
+FALLBACK_ANSWER = """
+I'm sorry, the assistant is temporarily unavailable and can't answer right now.
+Please try again in a few minutes. For questions about your own health or screening,
+please speak with a qualified clinician or your local clinic.
 """.strip()
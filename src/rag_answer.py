@@ -1,24 +1,30 @@
+import threading
 from typing import List, Dict, Any, Tuple
 
-import tiktoken
-from openai import OpenAI
-
+from clients import get_openai
 from config import Settings
-from prompts import SYSTEM_PROMPT, USER_TEMPLATE
-from retrieve import Retriever
-
-
-def _encoding():
-    return tiktoken.get_encoding("cl100k_base")
-
-
-def _count_tokens(text: str) -> int:
-    return len(_encoding().encode(text))
-
-
-def assemble_context(hits: List[Dict[str, Any]], max_tokens: int) -> str:
+from dedup import hit_sources
+from prompt_assembly import (
+    CONTEXT_SEPARATOR,
+    NO_BACKGROUND,
+    block_tokens,
+    build_messages,
+    context_tokens,
+    static_prefix_tokens,
+    usage_record,
+)
+from prompts import FALLBACK_ANSWER
+from resilience import ModelUnavailable, call_model, count
+from retrieve import get_retriever
+
+_warm = threading.Event()
+
+
+def assemble_context(hits: List[Dict[str, Any]], max_tokens: int) -> Tuple[str, int]:
+    """Join hit blocks up to ``max_tokens``; return the context and its token count."""
     seen = set()
     blocks = []
+    counts = []
     total = 0
 
     for h in hits:
@@ -27,43 +33,101 @@ def assemble_context(hits: List[Dict[str, Any]], max_tokens: int) -> str:
             continue
         seen.add(key)
 
-        source = h.get("source_name", "Unknown")
+        source = "; ".join(hit_sources(h))
         text = h.get("text", "")
         block = f"Source: {source}\n{text}"
-        block_tokens = _count_tokens(block)
+        n = block_tokens(block)
 
-        if total + block_tokens > max_tokens:
+        if total + n > max_tokens:
             break
 
         blocks.append(block)
-        total += block_tokens
+        counts.append(n)
+        total += n
+
+    return CONTEXT_SEPARATOR.join(blocks), context_tokens(counts)
+
+
+def warmup(connect: bool = True) -> None:
+    """Preload the tokenizer, FAISS index, metadata and lexical fallback index,
+    and open the HTTP pool.
+
+    Raises if the tokenizer or index cannot be loaded; the service is marked
+    warm as soon as they are. With ``connect`` the shared OpenAI client then
+    makes one short, best-effort request so the TLS handshake is paid here
+    rather than by the first question; a failed probe is only logged.
+    """
+    s = Settings()
+    static_prefix_tokens()
+    get_retriever().lexical
+    _warm.set()
+    if connect:
+        _probe_connection(s)
+
+
+def _probe_connection(s: Settings) -> None:
+    import openai
 
-    return "\n\n---\n\n".join(blocks)
+    try:
+        call_model(
+            "chat",
+            lambda timeout: get_openai().with_options(
+                timeout=min(timeout, s.warmup_connect_timeout_s), max_retries=0
+            ).models.retrieve(s.chat_model),
+        )
+    except openai.APIStatusError:
+        # Any HTTP response (e.g. 403 for keys without model-read permission)
+        # means the connection is open, which is all the probe is for.
+        pass
+    except Exception as e:
+        print(f"Warmup connect probe failed (non-fatal): {e}")
+
+
+def is_warm() -> bool:
+    return _warm.is_set()
 
 
 def answer(question: str, use_rag: bool = True) -> Tuple[str, List[Dict[str, Any]]]:
+    response, hits, _, _ = answer_with_usage(question, use_rag=use_rag)
+    return response, hits
+
+
+def answer_with_usage(
+    question: str, use_rag: bool = True
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any], str | None]:
+    """Like answer(), plus per-call token usage and a degraded flag.
+
+    The flag is ``"static"`` when the chat model was unavailable and
+    FALLBACK_ANSWER was returned, ``"lexical"`` when retrieval fell back to
+    BM25, and None for a normal answer.
+    """
     s = Settings()
-    client = OpenAI()
+    client = get_openai()
 
     hits: List[Dict[str, Any]] = []
+    degraded: str | None = None
     if use_rag:
-        hits = Retriever().retrieve(question, top_k=s.top_k)
-        context = assemble_context(hits, max_tokens=s.max_context_tokens)
+        hits, degraded = get_retriever().retrieve_with_mode(question, top_k=s.top_k)
+        context, n_context = assemble_context(hits, max_tokens=s.max_context_tokens)
     else:
-        context = "(no background found)"
-
-    user_msg = USER_TEMPLATE.format(question=question, context=context or "(no background found)")
-
-    res = client.chat.completions.create(
-        model=s.chat_model,
-        messages=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": user_msg},
-        ],
-        temperature=0.2,
-    )
-
-    return res.choices[0].message.content.strip(), hits
+        context, n_context = "", context_tokens([])
+
+    messages, estimate = build_messages(question, context or NO_BACKGROUND, n_context)
+
+    try:
+        res = call_model(
+            "chat",
+            lambda timeout: client.with_options(timeout=timeout, max_retries=0).chat.completions.create(
+                model=s.chat_model,
+                messages=messages,
+                temperature=0.2,
+            ),
+        )
+    except ModelUnavailable:
+        count("chat", "degraded_static")
+        return FALLBACK_ANSWER, hits, usage_record(None, estimate), "static"
+
+    return res.choices[0].message.content.strip(), hits, usage_record(res, estimate), degraded
 
 
 if __name__ == "__main__":
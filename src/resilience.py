@@ -0,0 +1,267 @@
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, TypeVar
+
+from config import Settings
+
+T = TypeVar("T")
+
+STAGES = ("embedding", "chat")
+
+
+class ModelUnavailable(RuntimeError):
+    """A model call could not complete within its deadline, retries or breaker."""
+
+
+_counter_lock = threading.Lock()
+_counters: Counter = Counter()
+
+
+def count(stage: str, event: str, n: int = 1) -> None:
+    with _counter_lock:
+        _counters[f"{stage}.{event}"] += n
+
+
+def counters() -> Dict[str, int]:
+    with _counter_lock:
+        return dict(_counters)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; lets one probe through after a cooldown."""
+
+    def __init__(self, stage: str, failure_threshold: int, reset_after_s: float) -> None:
+        self.stage = stage
+        self.failure_threshold = failure_threshold
+        self.reset_after_s = reset_after_s
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_after_s:
+                return False
+            self._probing = True
+        count(self.stage, "breaker_half_open")
+        return True
+
+    def release_probe(self) -> None:
+        """End a half-open probe without judging provider health."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            opened = self._probing or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            )
+            if opened:
+                self._opened_at = time.monotonic()
+            self._probing = False
+        if opened:
+            count(self.stage, "breaker_opened")
+
+
+class LatencyTracker:
+    def __init__(self, window: int, min_samples: int) -> None:
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> float | None:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+_s = Settings()
+_breakers = {
+    stage: CircuitBreaker(stage, _s.breaker_failure_threshold, _s.breaker_reset_s)
+    for stage in STAGES
+}
+_latency = {stage: LatencyTracker(_s.hedge_window, _s.hedge_min_samples) for stage in STAGES}
+_pool = ThreadPoolExecutor(max_workers=_s.hedge_pool_size, thread_name_prefix="model-call")
+_inflight_lock = threading.Lock()
+_inflight = 0
+
+
+def breaker(stage: str) -> CircuitBreaker:
+    return _breakers[stage]
+
+
+def _is_retryable(e: Exception) -> bool:
+    import openai
+
+    retryable = (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+        TimeoutError,
+        ConnectionError,
+    )
+    return isinstance(e, retryable)
+
+
+def _timed(stage: str, fn: Callable[[float], T], timeout: float) -> T:
+    start = time.monotonic()
+    result = fn(timeout)
+    _latency[stage].record(time.monotonic() - start)
+    return result
+
+
+def _pool_call(
+    stage: str,
+    fn: Callable[[float], T],
+    timeout: float,
+    deadline: float,
+    submitted: float,
+    started: threading.Event,
+) -> T:
+    """Worker body: record queue wait, then run with whatever budget is left."""
+    now = time.monotonic()
+    count(stage, "queue_wait_ms", int((now - submitted) * 1000))
+    started.set()
+    remaining = deadline - now
+    if remaining <= 0:
+        raise TimeoutError(f"{stage} call spent its deadline queued")
+    return _timed(stage, fn, min(timeout, remaining))
+
+
+def _submit(
+    stage: str, fn: Callable[[float], T], timeout: float, deadline: float, started: threading.Event
+) -> Future | None:
+    """Submit to the shared pool, or return None if no worker is free."""
+    global _inflight
+    with _inflight_lock:
+        if _inflight >= _s.hedge_pool_size:
+            return None
+        _inflight += 1
+
+    def _release(_: Future) -> None:
+        global _inflight
+        with _inflight_lock:
+            _inflight -= 1
+
+    f = _pool.submit(_pool_call, stage, fn, timeout, deadline, time.monotonic(), started)
+    f.add_done_callback(_release)
+    return f
+
+
+def _hedged(stage: str, fn: Callable[[float], T], timeout: float, deadline: float) -> T:
+    """Send a duplicate request if the first is slower than the recent p95.
+
+    The hedge clock starts when the primary call begins, not when it is
+    queued, and no hedge is sent while every pool worker is busy.
+    """
+    s = Settings()
+    hedge_after = _latency[stage].p95() or s.hedge_default_delay_s
+
+    started = threading.Event()
+    primary = _submit(stage, fn, timeout, deadline, started)
+    if primary is None:
+        count(stage, "hedge_skipped")
+        return _timed(stage, fn, min(timeout, deadline - time.monotonic()))
+
+    pending = {primary}
+    backup: Future | None = None
+    started.wait(timeout=max(deadline - time.monotonic(), 0))
+    done, _ = wait(pending, timeout=min(hedge_after, max(deadline - time.monotonic(), 0)))
+    if not done and deadline - time.monotonic() > 0:
+        backup = _submit(stage, fn, timeout, deadline, threading.Event())
+        if backup is None:
+            count(stage, "hedge_skipped")
+        else:
+            count(stage, "hedge_fired")
+            pending.add(backup)
+
+    last_exc: BaseException | None = None
+    while pending:
+        done, pending = wait(
+            pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED
+        )
+        if not done:
+            break
+        for f in done:
+            if f.exception() is None:
+                for other in pending:
+                    other.cancel()
+                if f is backup:
+                    count(stage, "hedge_won")
+                return f.result()
+            last_exc = f.exception()
+
+    for f in pending:
+        f.cancel()
+    if last_exc is not None:
+        raise last_exc
+    raise TimeoutError(f"{stage} call exceeded its deadline")
+
+
+def call_model(stage: str, fn: Callable[[float], T], hedge: bool = False) -> T:
+    """Run ``fn(timeout)`` under the stage's deadline, retry policy and breaker.
+
+    ``fn`` receives the per-attempt timeout in seconds and must pass it on to
+    the client. Provider failures surface as ModelUnavailable so callers can
+    degrade; non-retryable errors (bad request, auth) propagate unchanged.
+    """
+    s = Settings()
+    cb = _breakers[stage]
+    if not cb.allow():
+        count(stage, "short_circuit")
+        raise ModelUnavailable(f"{stage} circuit breaker is open")
+
+    attempt_timeout = getattr(s, f"{stage}_timeout_s")
+    deadline = time.monotonic() + getattr(s, f"{stage}_deadline_s")
+    attempt = 0
+
+    while True:
+        attempt += 1
+        timeout = min(attempt_timeout, deadline - time.monotonic())
+        try:
+            if hedge:
+                result = _hedged(stage, fn, timeout, deadline)
+            else:
+                result = _timed(stage, fn, timeout)
+        except Exception as e:
+            if not _is_retryable(e):
+                cb.release_probe()
+                raise
+            count(stage, "timeout" if "Timeout" in type(e).__name__ else "error")
+            delay = random.uniform(0, min(s.retry_max_delay_s, s.retry_base_delay_s * 2**attempt))
+            if attempt >= s.retry_max_attempts or time.monotonic() + delay >= deadline:
+                if attempt < s.retry_max_attempts:
+                    count(stage, "deadline_exceeded")
+                cb.record_failure()
+                raise ModelUnavailable(f"{stage} call failed after {attempt} attempt(s): {e}") from e
+            count(stage, "retry")
+            time.sleep(delay)
+            continue
+
+        cb.record_success()
+        return result
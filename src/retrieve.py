@@ -1,32 +1,108 @@
-from typing import List, Dict, Any
-
-import faiss
-import numpy as np
-import pandas as pd
-from openai import OpenAI
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
 
+from clients import get_openai
 from config import Settings
+from resilience import ModelUnavailable, call_model, count
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class LexicalIndex:
+    """Okapi BM25 over chunk texts; used when embeddings are unavailable."""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.docs = [Counter(_tokenize(t)) for t in texts]
+        self.lengths = [sum(d.values()) for d in self.docs]
+        self.avgdl = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        df: Counter = Counter()
+        for d in self.docs:
+            df.update(d.keys())
+        n = len(self.docs)
+        self.idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        terms = [t for t in set(_tokenize(query)) if t in self.idf]
+        scored = []
+        for i, (d, dl) in enumerate(zip(self.docs, self.lengths)):
+            score = 0.0
+            for t in terms:
+                tf = d.get(t, 0)
+                if tf:
+                    norm = tf + self.k1 * (1 - self.b + self.b * dl / self.avgdl)
+                    score += self.idf[t] * tf * (self.k1 + 1) / norm
+            if score > 0:
+                scored.append((i, score))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:k]
 
 
 class Retriever:
     def __init__(self) -> None:
+        import faiss
+        import pandas as pd
+
         self.s = Settings()
-        self.client = OpenAI()
+        self.client = get_openai()
         self.index = faiss.read_index(str(self.s.faiss_index_path))
         self.meta = pd.read_parquet(self.s.meta_path)
+        self._lexical: LexicalIndex | None = None
+
+    @property
+    def lexical(self) -> LexicalIndex:
+        if self._lexical is None:
+            self._lexical = LexicalIndex(self.meta["text"].tolist())
+        return self._lexical
 
-    def embed_query(self, query: str) -> np.ndarray:
-        res = self.client.embeddings.create(model=self.s.embedding_model, input=[query])
+    def embed_query(self, query: str) -> "np.ndarray":
+        import faiss
+        import numpy as np
+
+        res = call_model(
+            "embedding",
+            lambda timeout: self.client.with_options(timeout=timeout, max_retries=0).embeddings.create(
+                model=self.s.embedding_model, input=[query]
+            ),
+            hedge=True,
+        )
         vec = np.array(res.data[0].embedding, dtype="float32")
         faiss.normalize_L2(vec.reshape(1, -1))
         return vec.reshape(1, -1)
 
     def retrieve(self, query: str, top_k: int | None = None) -> List[Dict[str, Any]]:
+        return self.retrieve_with_mode(query, top_k)[0]
+
+    def retrieve_with_mode(
+        self, query: str, top_k: int | None = None
+    ) -> Tuple[List[Dict[str, Any]], str | None]:
+        """Hits plus ``"lexical"`` if embeddings were unavailable and BM25 was used."""
         k = top_k or self.s.top_k
-        q = self.embed_query(query)
+        try:
+            q = self.embed_query(query)
+        except ModelUnavailable:
+            count("embedding", "degraded_lexical")
+            return self.lexical_retrieve(query, k), "lexical"
         scores, idxs = self.index.search(q, k)
+        return self._rows(zip(idxs[0], scores[0])), None
+
+    def lexical_retrieve(self, query: str, k: int) -> List[Dict[str, Any]]:
+        return self._rows(self.lexical.search(query, k))
+
+    def _rows(self, ranked) -> List[Dict[str, Any]]:
         results = []
-        for score, idx in zip(scores[0], idxs[0]):
+        for idx, score in ranked:
             if idx < 0:
                 continue
             row = self.meta.iloc[int(idx)].to_dict()
@@ -35,5 +111,11 @@ class Retriever:
         return results
 
 
+@lru_cache(maxsize=1)
+def get_retriever() -> Retriever:
+    """Process-wide Retriever; the index and metadata are loaded once."""
+    return Retriever()
+
+
 def retrieve(query: str, top_k: int | None = None) -> List[Dict[str, Any]]:
-    return Retriever().retrieve(query, top_k=top_k)
+    return get_retriever().retrieve(query, top_k=top_k)